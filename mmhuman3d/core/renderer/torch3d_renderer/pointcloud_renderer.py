@@ -1,4 +1,6 @@
+import math
 import warnings
+import weakref
 from typing import Iterable, List, Optional, Tuple, Union
 
 import torch
@@ -11,10 +13,68 @@ from pytorch3d.renderer import (
 from pytorch3d.structures import Meshes, Pointclouds
 
 from mmhuman3d.core.cameras import MMCamerasBase
-from mmhuman3d.utils.mesh_utils import mesh_to_pointcloud_vc
+from mmhuman3d.utils.mesh_utils import (
+    mesh_to_padded_points_vc,
+    mesh_to_pointcloud_vc,
+)
 from .base_renderer import BaseRenderer
 
 
+def _is_inference_mode_enabled() -> bool:
+    """Whether inference mode is enabled, it only exists from torch 1.9."""
+    return hasattr(
+        torch,
+        'is_inference_mode_enabled') and torch.is_inference_mode_enabled()
+
+
+def _is_inference(tensor: torch.Tensor) -> bool:
+    """Whether the tensor is an inference tensor, which does not track the
+    version counter, `is_inference` only exists from torch 1.9."""
+    return hasattr(tensor, 'is_inference') and tensor.is_inference()
+
+
+def _normalize_points_features(
+    vertices: Optional[torch.Tensor], verts_rgba: Optional[torch.Tensor],
+    device: Union[torch.device, str]
+) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    """Batch the points and features tensors of a single cloud and move them
+    to `device`.
+
+    Args:
+        vertices (Optional[torch.Tensor]): points of shape (N, 3) or
+            (B, N, 3).
+        verts_rgba (Optional[torch.Tensor]): features of shape (N, C) or
+            (B, N, C).
+        device (Union[torch.device, str]): device of the outputs.
+
+    Returns:
+        Tuple[torch.Tensor, torch.Tensor, torch.Tensor]: points of shape
+            (B, N, 3), features of shape (B, N, C) and the number of points
+            of each cloud of shape (B, ).
+    """
+    assert vertices is not None, '`vertices` should not be None.'
+    assert verts_rgba is not None, '`verts_rgba` should not be None.'
+    if vertices.dim() == 2:
+        vertices = vertices.unsqueeze(0)
+    if verts_rgba.dim() == 2:
+        verts_rgba = verts_rgba.unsqueeze(0)
+    vertices = vertices.to(device)
+    verts_rgba = verts_rgba.to(device)
+    num_points = torch.full((vertices.shape[0], ),
+                            vertices.shape[1],
+                            dtype=torch.int64,
+                            device=device)
+    return vertices, verts_rgba, num_points
+
+
+def _dists_to_weights(dists: torch.Tensor,
+                      inv_radius_sq: float) -> torch.Tensor:
+    """Convert squared distances of fragments to compositing weights, the
+    offset is added in place so no second temporary is allocated, the
+    (N, H, W, K) layout is kept."""
+    return dists.mul(-inv_radius_sq).add_(1.0)
+
+
 class PointCloudRenderer(BaseRenderer):
 
     def __init__(self,
@@ -23,6 +83,7 @@ class PointCloudRenderer(BaseRenderer):
                  output_path: Optional[str] = None,
                  out_img_format: str = '%06d.png',
                  radius: Optional[float] = None,
+                 use_torch_compile: bool = False,
                  **kwargs) -> None:
         """Point cloud renderer.
 
@@ -38,11 +99,16 @@ class PointCloudRenderer(BaseRenderer):
             out_img_format (str, optional): name format for temp images.
                 Defaults to '%06d.png'.
             radius (float, optional): radius of points. Defaults to None.
+            use_torch_compile (bool, optional): whether to compile the
+                weighting and compositing after rasterization with
+                `torch.compile`, which requires torch >= 2.0. Keep it False
+                for eager debugging. Defaults to False.
 
         Returns:
             None
         """
         self.radius = radius
+        self._use_torch_compile = use_torch_compile
         super().__init__(
             resolution=resolution,
             device=device,
@@ -81,6 +147,24 @@ class PointCloudRenderer(BaseRenderer):
         else:
             raise TypeError(
                 f'Wrong type of rasterizer: {type(self.rasterizer)}.')
+        if self.rasterizer.raster_settings.bin_size == 0:
+            warnings.warn(
+                '`bin_size=0` uses the naive rasterization, remove it to '
+                'use the faster coarse-to-fine rasterization.')
+        self._update_inv_radius_sq()
+        self._features_cmajor_cache = None
+        self._camera_matrix_cache = None
+
+        self._compiled_post_rasterize = self._post_rasterize
+        if self._use_torch_compile:
+            if hasattr(torch, 'compile'):
+                # no cuda graphs, they reuse the output buffers which are
+                # returned to the caller
+                self._compiled_post_rasterize = torch.compile(
+                    self._post_rasterize, dynamic=False)
+            else:
+                warnings.warn('`torch.compile` requires torch >= 2.0, '
+                              'will run in eager mode.')
 
         if isinstance(compositor, dict):
             self.compositor = AlphaCompositor(**compositor)
@@ -93,6 +177,17 @@ class PointCloudRenderer(BaseRenderer):
                 f'Wrong type of compositor: {type(self.compositor)}.')
         self = self.to(self.device)
 
+    def _update_inv_radius_sq(self):
+        """Cache 1 / r^2 of the rasterizer radius for the weights."""
+        self._radius = self.rasterizer.raster_settings.radius
+        self._inv_radius_sq = 1.0 / float(self._radius)**2
+
+    def _update_resolution(self, cameras, **kwargs):
+        super()._update_resolution(cameras, **kwargs)
+        # in case that the radius of the raster settings is modified
+        if self.rasterizer.raster_settings.radius != self._radius:
+            self._update_inv_radius_sq()
+
     def forward(
         self,
         pointclouds: Optional[Pointclouds] = None,
@@ -121,39 +216,67 @@ class PointCloudRenderer(BaseRenderer):
             backgrounds (Optional[torch.Tensor], optional): background images.
                 Defaults to None.
 
+        With gradients disabled and `AlphaCompositor`, a non-differentiable
+        z-buffer splatting is used instead of the PyTorch3D rasterizer in
+        eval mode, or when `points_per_pixel` is 1.
+
         Returns:
             Union[None, torch.Tensor]: Return tensor or None.
         """
-        if pointclouds is None:
-            if meshes is not None:
-                pointclouds = mesh_to_pointcloud_vc(meshes)
-            else:
-                assert vertices is not None
-                if isinstance(vertices, torch.Tensor):
-                    if vertices.ndim == 2:
-                        vertices = vertices[None]
-                if isinstance(verts_rgba, torch.Tensor):
-                    if verts_rgba.ndim == 2:
-                        verts_rgba = verts_rgba[None]
-                pointclouds = Pointclouds(points=vertices, features=verts_rgba)
-        else:
+        if pointclouds is not None:
             if vertices is not None or verts_rgba is not None:
                 warnings.warn(
                     'Redundant input, will ignore `vertices` and `verts_rgb`.')
-        pointclouds = pointclouds.to(self.device)
+        elif meshes is not None:
+            if meshes.equisized:
+                vertices, verts_rgba = mesh_to_padded_points_vc(meshes)
+            else:
+                pointclouds = mesh_to_pointcloud_vc(meshes)
+        elif isinstance(vertices, list) or isinstance(verts_rgba, list):
+            pointclouds = Pointclouds(points=vertices, features=verts_rgba)
+        if pointclouds is not None:
+            pointclouds = pointclouds.to(self.device)
+            points = pointclouds.points_padded()
+            features = pointclouds.features_padded()
+            num_points = pointclouds.num_points_per_cloud()
+        else:
+            # Batched tensors have equal point counts, so padded is already
+            # the packed layout and no `Pointclouds` is needed to pack them.
+            points, features, num_points = _normalize_points_features(
+                vertices, verts_rgba, self.device)
         self._update_resolution(cameras, **kwargs)
-        fragments = self.rasterizer(pointclouds, cameras=cameras)
-        r = self.rasterizer.raster_settings.radius
-
-        dists2 = fragments.dists.permute(0, 3, 1, 2)
-        weights = 1 - dists2 / (r * r)
-        rendered_images = self.compositor(
-            fragments.idx.long().permute(0, 3, 1, 2),
-            weights,
-            pointclouds.features_packed().permute(1, 0),
-            **kwargs,
-        )
-        rendered_images = rendered_images.permute(0, 2, 3, 1)
+        points_per_pixel = self.rasterizer.raster_settings.points_per_pixel
+        # With a single point per pixel the z-buffer splatting gives the same
+        # images as the rasterizer with `AlphaCompositor`, other compositors
+        # weight the features differently.
+        use_fast_render = not torch.is_grad_enabled() and (
+            not self.training or points_per_pixel == 1)
+        use_fast_render = use_fast_render and type(
+            self.compositor) is AlphaCompositor
+        if use_fast_render:
+            rendered_images = self._fast_render(
+                points, features, num_points, cameras=cameras, **kwargs)
+        elif int(num_points.max()) == 0:
+            # empty clouds would crash the rasterizer, only the background
+            # is rendered for them
+            batch_size, _, num_channels = features.shape
+            height, width = self.resolution
+            background_mask = features.new_ones((batch_size, height, width),
+                                                dtype=torch.bool)
+            rendered_images = self._add_background(
+                features.new_zeros((batch_size, height, width, num_channels)),
+                background_mask, **kwargs)
+        else:
+            if pointclouds is None:
+                pointclouds = Pointclouds(points=points)
+            # padded features of equisized clouds are packed contiguously
+            if pointclouds.equisized:
+                features_cmajor = self._get_features_cmajor(features)
+            else:
+                features_cmajor = self._get_features_cmajor(
+                    pointclouds.features_packed())
+            rendered_images = self._render(pointclouds, features_cmajor,
+                                           cameras, **kwargs)
 
         if self.output_path is not None:
             rgba = self.tensor2rgba(rendered_images)
@@ -161,3 +284,234 @@ class PointCloudRenderer(BaseRenderer):
                 self.write_images(rgba, backgrounds, indexes)
 
         return rendered_images
+
+    def _get_features_cmajor(self, features: torch.Tensor) -> torch.Tensor:
+        """Get contiguous packed features in shape (C, P), which the
+        compositor reads channel by channel.
+
+        The result is cached for the input tensor, so repeated renders of the
+        same features skip the transpose, until the input is modified in
+        place. Inputs requiring grad, inference tensors and inputs in
+        inference mode are not cached.
+
+        Args:
+            features (torch.Tensor): packed features of shape (P, C), or
+                padded features of equisized clouds of shape (B, N, C).
+
+        Returns:
+            torch.Tensor: contiguous packed features of shape (C, P).
+        """
+        cache = self._features_cmajor_cache
+        if cache is not None and cache[0]() is features and \
+                cache[1] == features._version:
+            return cache[2]
+        features_cmajor = features.reshape(-1, features.shape[-1]).t()
+        features_cmajor = features_cmajor.contiguous()
+        if features.requires_grad or _is_inference(features) or \
+                _is_inference_mode_enabled():
+            self._features_cmajor_cache = None
+        else:
+            self._features_cmajor_cache = (weakref.ref(features),
+                                           features._version, features_cmajor)
+        return features_cmajor
+
+    def _get_camera_matrix(self, cameras: MMCamerasBase) -> torch.Tensor:
+        """Get the world to view depth and world to NDC transforms of the
+        cameras in one matrix, so that points are projected by one matmul.
+
+        The result is cached for the cameras object, render_runner reuses
+        the same slice of static cameras for each batch, so the transforms
+        are only composed once for them. The cache is dropped once any
+        tensor of the cameras is replaced or modified in place.
+
+        Args:
+            cameras (MMCamerasBase): cameras for render.
+
+        Returns:
+            torch.Tensor: matrix of shape (N, 4, 5) for row vectors of
+                homogeneous points. The first column gives the view depth,
+                the others give the homogeneous NDC coordinates.
+        """
+        camera_tensors = [
+            v for v in vars(cameras).values() if isinstance(v, torch.Tensor)
+        ]
+        # inference tensors do not track the version counter
+        cacheable = not any(_is_inference(v) for v in camera_tensors)
+        if cacheable:
+            key = tuple((id(v), v._version) for v in camera_tensors)
+            cache = self._camera_matrix_cache
+            if cache is not None and cache[0]() is cameras and \
+                    cache[1] == key:
+                return cache[2]
+        world_to_view = cameras.get_world_to_view_transform().get_matrix()
+        world_to_ndc = cameras.get_full_projection_transform()
+        if not cameras.in_ndc():
+            world_to_ndc = world_to_ndc.compose(
+                cameras.get_ndc_camera_transform())
+        camera_matrix = torch.cat(
+            [world_to_view[..., 2:3],
+             world_to_ndc.get_matrix()], dim=-1)
+        if cacheable:
+            self._camera_matrix_cache = (weakref.ref(cameras), key,
+                                         camera_matrix)
+        else:
+            self._camera_matrix_cache = None
+        return camera_matrix
+
+    def _render(self, pointclouds: Pointclouds, features: torch.Tensor,
+                cameras: MMCamerasBase, **kwargs) -> torch.Tensor:
+        """Differentiable render with the PyTorch3D rasterizer and
+        compositor, `features` are packed in shape (C, P)."""
+        fragments = self.rasterizer(pointclouds, cameras=cameras)
+        rendered_images = self._compiled_post_rasterize(
+            fragments.dists,
+            fragments.idx,
+            features,
+            **kwargs,
+        )
+        return rendered_images
+
+    def _post_rasterize(self, dists: torch.Tensor, idx: torch.Tensor,
+                        features: torch.Tensor, **kwargs) -> torch.Tensor:
+        """Weight and composite the fragments of the rasterizer.
+
+        Args:
+            dists (torch.Tensor): squared distances of shape (N, H, W, K).
+            idx (torch.Tensor): point indexes of shape (N, H, W, K).
+            features (torch.Tensor): packed features of shape (C, P).
+
+        Returns:
+            torch.Tensor: composited images of shape (N, H, W, C).
+        """
+        weights = _dists_to_weights(dists, self._inv_radius_sq)
+        rendered_images = self.compositor(
+            idx.long().permute(0, 3, 1, 2),
+            weights.permute(0, 3, 1, 2),
+            features,
+            **kwargs,
+        )
+        return rendered_images.permute(0, 2, 3, 1)
+
+    def _add_background(self, images: torch.Tensor,
+                        background_mask: torch.Tensor,
+                        **kwargs) -> torch.Tensor:
+        """Fill the pixels without points with the background color of the
+        compositor, which could be overridden by `background_color` in
+        kwargs.
+
+        Args:
+            images (torch.Tensor): images of shape (N, H, W, C).
+            background_mask (torch.Tensor): mask of shape (N, H, W).
+
+        Returns:
+            torch.Tensor: images of shape (N, H, W, C).
+        """
+        background_color = kwargs.get(
+            'background_color',
+            getattr(self.compositor, 'background_color', None))
+        if background_color is None:
+            return images
+        background_color = torch.as_tensor(
+            background_color, dtype=images.dtype,
+            device=images.device).view(-1)
+        if images.shape[-1] == 4 and background_color.shape[0] == 3:
+            background_color = torch.cat(
+                [background_color,
+                 background_color.new_ones(1)])
+        images[background_mask] = background_color
+        return images
+
+    def _fast_render(self,
+                     points: torch.Tensor,
+                     features: torch.Tensor,
+                     num_points: torch.Tensor,
+                     cameras: Optional[MMCamerasBase] = None,
+                     **kwargs) -> torch.Tensor:
+        """Non-differentiable render for visualization.
+
+        Points are projected to pixels and splatted as discs of
+        `raster_settings.radius`. Each pixel keeps only the nearest point,
+        which is resolved by sorting the covered pixels together with the
+        depth ranks of the points, so no K-buffer of fragments is
+        allocated.
+
+        Args:
+            points (torch.Tensor): padded points of shape (B, N, 3).
+            features (torch.Tensor): padded features of shape (B, N, C).
+            num_points (torch.Tensor): number of valid points of each
+                cloud, shape should be (B, ).
+            cameras (Optional[MMCamerasBase], optional): cameras for render.
+                Defaults to None.
+
+        Returns:
+            torch.Tensor: rendered images of shape (B, H, W, C).
+        """
+        cameras = self.rasterizer.cameras if cameras is None else cameras
+        image_size = self.rasterizer.raster_settings.image_size
+        height, width = (image_size, image_size) if isinstance(
+            image_size, int) else image_size
+        radius = float(self.rasterizer.raster_settings.radius)
+        batch_size, num_verts, num_channels = features.shape
+        device = points.device
+        # the shorter side of the image spans [-1, 1] in NDC
+        scale = min(height, width) / 2.0
+
+        camera_matrix = self._get_camera_matrix(cameras).to(points.dtype)
+        points_proj = torch.matmul(
+            torch.cat([points, torch.ones_like(points[..., :1])], dim=-1),
+            camera_matrix)
+        depth = points_proj[..., 0]
+        points_ndc = points_proj[..., 1:4] / points_proj[..., 4:]
+        # continuous pixel coordinates, pixel centers are integers
+        x = (width - 1) / 2.0 - points_ndc[..., 0] * scale
+        y = (height - 1) / 2.0 - points_ndc[..., 1] * scale
+        is_padding = torch.arange(
+            num_verts, device=device)[None] >= num_points.to(device)[:, None]
+        valid = (depth > 0) & ~is_padding
+
+        # expand each point to the (2r+1)^2 neighbor pixels of its disc
+        radius_pix = int(math.ceil(radius * scale))
+        offsets = torch.arange(-radius_pix, radius_pix + 1, device=device)
+        offset_x = offsets.repeat(len(offsets))
+        offset_y = offsets.repeat_interleave(len(offsets))
+        pix_x = x.round().long()[..., None] + offset_x
+        pix_y = y.round().long()[..., None] + offset_y
+        dists2 = (pix_x - x[..., None]).square() + (pix_y -
+                                                    y[..., None]).square()
+        valid = valid[..., None] & (dists2 <= (radius * scale)**2)
+        valid &= (pix_x >= 0) & (pix_x < width)
+        valid &= (pix_y >= 0) & (pix_y < height)
+
+        # rank the points by depth, so the nearest point of each pixel is
+        # the first one after sorting the fragments by (pixel, rank)
+        depth_order = depth.reshape(-1).argsort()
+        num_ranks = max(depth_order.numel(), 1)
+        point_rank = torch.empty_like(depth_order)
+        point_rank[depth_order] = torch.arange(
+            depth_order.numel(), device=device)
+        pix_idx = (torch.arange(batch_size, device=device).view(-1, 1, 1) *
+                   height + pix_y) * width + pix_x
+        fragment_pix = pix_idx[valid]
+        fragment_rank = point_rank.view(batch_size, num_verts,
+                                        1).expand_as(pix_idx)[valid]
+        fragment_order = (fragment_pix * num_ranks + fragment_rank).argsort()
+        hit_pix, counts = torch.unique_consecutive(
+            fragment_pix[fragment_order], return_counts=True)
+        nearest_fragment = fragment_order[counts.cumsum(0) - counts]
+        nearest_idx = depth_order[fragment_rank[nearest_fragment]]
+        hit = torch.zeros(
+            batch_size * height * width, dtype=torch.bool, device=device)
+        hit[hit_pix] = True
+        hit_x = (hit_pix % width).to(x.dtype)
+        hit_y = (hit_pix // width % height).to(y.dtype)
+        hit_dists2 = (hit_x - x.reshape(-1)[nearest_idx]).square() + (
+            hit_y - y.reshape(-1)[nearest_idx]).square()
+        weights = 1 - hit_dists2 / (radius * scale)**2
+
+        rendered_images = features.new_zeros(
+            (batch_size * height * width, num_channels))
+        rendered_images[hit_pix] = weights[:, None] * features.reshape(
+            -1, num_channels)[nearest_idx]
+        return self._add_background(
+            rendered_images.view(batch_size, height, width, num_channels),
+            ~hit.view(batch_size, height, width), **kwargs)
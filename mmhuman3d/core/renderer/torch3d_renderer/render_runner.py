@@ -1,6 +1,6 @@
 import math
 import os
-from typing import Iterable, Optional, Union
+from typing import Dict, Iterable, Optional, Union
 
 import numpy as np
 import torch
@@ -19,6 +19,85 @@ from .lights import AmbientLights, MMLights, build_lights
 osj = os.path.join
 
 
+def _slice_forward_params(
+        forward_params: dict,
+        start: int,
+        end: int,
+        device: Union[str, torch.device],
+        static_batches: Optional[Dict[str, dict]] = None) -> dict:
+    """Slice the forward params which support indexing by batch dim.
+
+    Params in `static_batches` are the same for every frame, their slices
+    are cached by the batch length and reused for the following batches.
+    Static params of a single frame are extended to the batch length.
+    """
+    static_batches = {} if static_batches is None else static_batches
+    forward_params_batch = {}
+    for k in forward_params:
+        if hasattr(forward_params[k], '__getitem__'):
+            cache = static_batches.get(k)
+            if cache is not None and end - start in cache:
+                forward_params_batch[k] = cache[end - start]
+                continue
+            if cache is not None and len(forward_params[k]) == 1:
+                # a single static frame is broadcast to the batch
+                value = _extend_single(forward_params[k], end - start)
+            else:
+                value = forward_params[k][start:end]
+            if isinstance(value, torch.Tensor):
+                value = value.to(device, non_blocking=True)
+            else:
+                value = value.to(device)
+            if cache is not None:
+                cache[end - start] = value
+            forward_params_batch[k] = value
+    return forward_params_batch
+
+
+def _extend_single(value, batch_size: int):
+    """Extend a param of a single frame to `batch_size` frames, tensors are
+    expanded without copy."""
+    if isinstance(value, torch.Tensor):
+        return value.expand(batch_size, *value.shape[1:])
+    return value.extend(batch_size)
+
+
+def _estimate_batch_size(renderer: BaseRenderer,
+                         cameras: MMCamerasBase,
+                         meshes: Meshes,
+                         device: Union[str, torch.device],
+                         memory_fraction: float = 0.5) -> int:
+    """Estimate the number of frames which could be rendered in one batch
+    within the free memory of the cuda device.
+
+    The estimation counts the fragments of the rasterizer, the temporaries
+    of shading or compositing on them and the geometry copied for each
+    frame, only `memory_fraction` of the free memory is used to leave room
+    for the others.
+    """
+    if hasattr(torch.cuda, 'mem_get_info'):
+        free_memory, _ = torch.cuda.mem_get_info(device)
+    else:
+        # `mem_get_info` requires torch >= 1.11, count the memory not
+        # reserved by this process instead
+        free_memory = torch.cuda.get_device_properties(
+            device).total_memory - torch.cuda.memory_reserved(device)
+    raster_settings = renderer.rasterizer.raster_settings
+    num_layers = getattr(raster_settings, 'faces_per_pixel',
+                         getattr(raster_settings, 'points_per_pixel', 1))
+    if isinstance(cameras, MMCamerasBase):
+        height, width = (int(cameras.resolution[0][0]),
+                         int(cameras.resolution[0][1]))
+    else:
+        height, width = renderer.resolution
+    num_verts = meshes.verts_padded().shape[1]
+    # about 64 float32 or int32 values per fragment for rasterization and
+    # shading, e.g. the texels, normals and blending of soft phong shading,
+    # and 16 values per vertex
+    frame_bytes = height * width * num_layers * 256 + num_verts * 64
+    return max(int(free_memory * memory_fraction) // frame_bytes, 1)
+
+
 def render(renderer: Union[nn.Module, dict],
            meshes: Union[Meshes, None] = None,
            output_path: Optional[str] = None,
@@ -26,10 +105,12 @@ def render(renderer: Union[nn.Module, dict],
            device: Union[str, torch.device] = 'cpu',
            cameras: Union[MMCamerasBase, CamerasBase, dict, None] = None,
            lights: Union[MMLights, dict, None] = None,
-           batch_size: int = 5,
+           batch_size: Optional[int] = 5,
            return_tensor: bool = False,
            no_grad: bool = False,
            verbose: bool = True,
+           inference_mode: bool = True,
+           static_geometry: bool = False,
            **forward_params):
 
     if isinstance(renderer, dict):
@@ -74,25 +155,50 @@ def render(renderer: Union[nn.Module, dict],
                 resolution=resolution))
     else:
         raise TypeError('Wrong input cameras type.')
-    num_frames = len(meshes)
+    # static geometry of a single frame is rendered for each camera
+    if static_geometry and len(meshes) == 1:
+        num_frames = len(cameras)
+    else:
+        num_frames = len(meshes)
+    # cameras and lights extended from a single one are the same for all the
+    # frames, so they are sliced once and reused by every batch.
+    static_batches = {}
     if isinstance(lights, dict):
         lights = build_lights(lights)
     elif isinstance(lights, MMLights):
         lights = lights
     elif lights is None:
         lights = AmbientLights(device=device).extend(num_frames)
+        static_batches.update(lights={})
     else:
         raise ValueError('Wrong light type.')
 
     if len(cameras) == 1:
         cameras = cameras.extend(num_frames)
+        static_batches.update(cameras={})
     if len(lights) == 1:
         lights = lights.extend(num_frames)
+        static_batches.update(lights={})
 
     forward_params.update(lights=lights, cameras=cameras, meshes=meshes)
+    if static_geometry:
+        # the geometry is the same for all the frames, so it is sliced once
+        # for each batch length. Other params such as backgrounds are still
+        # sliced for each batch.
+        for k in ('meshes', 'vertices', 'verts_rgba', 'pointclouds'):
+            if k in forward_params:
+                static_batches.setdefault(k, {})
+    if batch_size is None:
+        # batches as large as the memory allows save the python loop over
+        # small batches, all the frames are rendered at once on cpu
+        if torch.device(device).type == 'cuda':
+            batch_size = _estimate_batch_size(renderer, cameras, meshes,
+                                              device)
+        else:
+            batch_size = num_frames
 
     batch_size = min(batch_size, num_frames)
-    tensors = []
+    tensors = None
     for k in forward_params:
         if isinstance(forward_params[k], np.ndarray):
             forward_params.update(
@@ -101,26 +207,58 @@ def render(renderer: Union[nn.Module, dict],
         iter_func = trange
     else:
         iter_func = range
-    for i in iter_func(math.ceil(num_frames // batch_size)):
-        indexes = list(
-            range(i * batch_size, min((i + 1) * batch_size, len(meshes))))
-        foward_params_batch = {}
+    num_batches = math.ceil(num_frames / batch_size)
+    index_ranges = [(i * batch_size, min((i + 1) * batch_size, num_frames))
+                    for i in range(num_batches)]
+    # Double buffering on cuda: the next batch is sliced and copied on a side
+    # stream while the current batch is rendered on the current stream.
+    if torch.device(device).type == 'cuda':
+        compute_stream = torch.cuda.current_stream(device)
+        copy_stream = torch.cuda.Stream(device)
+    else:
+        compute_stream = copy_stream = None
+    next_params_batch = _slice_forward_params(forward_params, *index_ranges[0],
+                                              device, static_batches)
+    for i in iter_func(num_batches):
+        start, end = index_ranges[i]
+        indexes = list(range(start, end))
+        if copy_stream is not None:
+            compute_stream.wait_stream(copy_stream)
+        foward_params_batch = next_params_batch
 
-        for k in forward_params:
-            if hasattr(forward_params[k], '__getitem__'):
-                foward_params_batch[k] = forward_params[k][indexes].to(device)
+        if i + 1 < num_batches:
+            if copy_stream is not None:
+                # memory of the previous batch is reused by the side stream,
+                # so its rendering should have finished.
+                copy_stream.wait_stream(compute_stream)
+            # a None stream is a no-op context, also without cuda
+            with torch.cuda.stream(copy_stream):
+                next_params_batch = _slice_forward_params(
+                    forward_params, *index_ranges[i + 1], device,
+                    static_batches)
 
         if no_grad:
-            with torch.no_grad():
+            # `inference_mode` skips the view and version counter tracking,
+            # use `no_grad` if the inputs would be used by autograd
+            # afterwards. It is only available from torch 1.9.
+            if inference_mode and hasattr(torch, 'inference_mode'):
+                grad_context = torch.inference_mode()
+            else:
+                grad_context = torch.no_grad()
+            with grad_context:
                 images_batch = renderer(indexes=indexes, **foward_params_batch)
 
         else:
             images_batch = renderer(indexes=indexes, **foward_params_batch)
         if return_tensor:
-            tensors.append(images_batch)
+            # write batches into one buffer instead of concatenating them
+            if tensors is None:
+                tensors = torch.empty((num_frames, *images_batch.shape[1:]),
+                                      dtype=images_batch.dtype,
+                                      device=images_batch.device)
+            tensors[start:end].copy_(images_batch, non_blocking=True)
 
     renderer.export()
 
     if return_tensor:
-        tensors = torch.cat(tensors)
         return tensors
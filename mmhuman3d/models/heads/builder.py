@@ -9,21 +9,35 @@ from .hybrik_head import HybrIKHead
 from .pare_head import PareHead
 from .pymafx_head import PyMAFXHead, Regressor
 
+# Heads shipped with mmhuman3d, `build_head` dispatches these directly.
+_HEADS = {
+    'HybrIKHead': HybrIKHead,
+    'HMRHead': HMRHead,
+    'PareHead': PareHead,
+    'ExPoseBodyHead': ExPoseBodyHead,
+    'ExPoseHandHead': ExPoseHandHead,
+    'ExPoseFaceHead': ExPoseFaceHead,
+    'CliffHead': CliffHead,
+    'PyMAFXHead': PyMAFXHead,
+    'Regressor': Regressor,
+}
+
 HEADS = Registry('heads')
 
-HEADS.register_module(name='HybrIKHead', module=HybrIKHead)
-HEADS.register_module(name='HMRHead', module=HMRHead)
-HEADS.register_module(name='PareHead', module=PareHead)
-HEADS.register_module(name='ExPoseBodyHead', module=ExPoseBodyHead)
-HEADS.register_module(name='ExPoseHandHead', module=ExPoseHandHead)
-HEADS.register_module(name='ExPoseFaceHead', module=ExPoseFaceHead)
-HEADS.register_module(name='CliffHead', module=CliffHead)
-HEADS.register_module(name='PyMAFXHead', module=PyMAFXHead)
-HEADS.register_module(name='Regressor', module=Regressor)
+for name, module in _HEADS.items():
+    HEADS.register_module(name=name, module=module)
 
 
 def build_head(cfg):
     """Build head."""
     if cfg is None:
         return None
+    head_type = cfg.get('type')
+    # built-in heads are built directly, unless they are overridden in
+    # `HEADS` by external code, e.g. with `force=True`
+    if isinstance(head_type, str) and head_type in _HEADS and HEADS.get(
+            head_type) is _HEADS[head_type]:
+        args = cfg.copy()
+        args.pop('type')
+        return _HEADS[head_type](**args)
     return HEADS.build(cfg)
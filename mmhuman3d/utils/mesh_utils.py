@@ -1,5 +1,5 @@
 import warnings
-from typing import List, Optional, Union
+from typing import List, Optional, Tuple, Union
 
 import torch
 from pytorch3d.io import IO
@@ -56,12 +56,12 @@ def join_batch_meshes_as_scene(
     return meshes_final
 
 
-def mesh_to_pointcloud_vc(
+def mesh_to_padded_points_vc(
     meshes: Meshes,
     include_textures: bool = True,
     alpha: float = 1.0,
-) -> Pointclouds:
-    """Convert PyTorch3D vertex color `Meshes` to `PointClouds`.
+) -> Tuple[torch.Tensor, Optional[torch.Tensor]]:
+    """Read padded points and colors of PyTorch3D vertex color `Meshes`.
 
     Args:
         meshes (Meshes): input meshes.
@@ -72,7 +72,9 @@ def mesh_to_pointcloud_vc(
             Defaults to 1.0.
 
     Returns:
-        Pointclouds: output pointclouds.
+        Tuple[torch.Tensor, Optional[torch.Tensor]]: padded points of shape
+            (B, N, 3) and rgba of shape (B, N, 4), rgba is None if
+            `include_textures` is False.
     """
     assert isinstance(
         meshes.textures,
@@ -85,6 +87,29 @@ def mesh_to_pointcloud_vc(
              torch.ones_like(verts_rgb)[..., 0:1] * alpha], dim=-1)
     else:
         verts_rgba = None
+    return vertices, verts_rgba
+
+
+def mesh_to_pointcloud_vc(
+    meshes: Meshes,
+    include_textures: bool = True,
+    alpha: float = 1.0,
+) -> Pointclouds:
+    """Convert PyTorch3D vertex color `Meshes` to `PointClouds`.
+
+    Args:
+        meshes (Meshes): input meshes.
+        include_textures (bool, optional): Whether include colors.
+            Require the texture of input meshes is vertex color.
+            Defaults to True.
+        alpha (float, optional): transparency.
+            Defaults to 1.0.
+
+    Returns:
+        Pointclouds: output pointclouds.
+    """
+    vertices, verts_rgba = mesh_to_padded_points_vc(meshes, include_textures,
+                                                    alpha)
     pointclouds = Pointclouds(points=vertices, features=verts_rgba)
     return pointclouds
 
@@ -0,0 +1,31 @@
+from mmhuman3d.models.heads.builder import HEADS, HMRHead, build_head
+
+
+def test_build_head():
+    assert build_head(None) is None
+
+    cfg = dict(type='HMRHead', feat_dim=2048)
+    head = build_head(cfg)
+    assert isinstance(head, HMRHead)
+    # cfg should not be modified
+    assert cfg['type'] == 'HMRHead'
+
+    # heads registered to HEADS from outside are still built
+    @HEADS.register_module()
+    class CustomHead(HMRHead):
+        pass
+
+    head = build_head(dict(type='CustomHead', feat_dim=2048))
+    assert isinstance(head, CustomHead)
+    HEADS.module_dict.pop('CustomHead')
+
+    # built-in heads overridden in HEADS should take effect
+    class OverriddenHead(HMRHead):
+        pass
+
+    HEADS.register_module(name='HMRHead', module=OverriddenHead, force=True)
+    try:
+        head = build_head(dict(type='HMRHead', feat_dim=2048))
+        assert isinstance(head, OverriddenHead)
+    finally:
+        HEADS.register_module(name='HMRHead', module=HMRHead, force=True)
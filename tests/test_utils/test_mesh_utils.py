@@ -15,6 +15,7 @@ from mmhuman3d.utils.mesh_utils import \
     join_batch_meshes_as_scene as join_batch_meshes_as_scene_
 from mmhuman3d.utils.mesh_utils import (
     load_plys_as_meshes,
+    mesh_to_padded_points_vc,
     mesh_to_pointcloud_vc,
     save_meshes_as_objs,
     save_meshes_as_plys,
@@ -158,3 +159,13 @@ def test_mesh2pointcloud():
     Torus.textures = None
     with pytest.raises(AssertionError):
         mesh_to_pointcloud_vc(Torus)
+    with pytest.raises(AssertionError):
+        mesh_to_padded_points_vc(Torus)
+    Torus.textures = TexturesVertex(
+        verts_features=torch.ones_like(Torus.verts_padded()))
+    vertices, verts_rgba = mesh_to_padded_points_vc(Torus, alpha=0.5)
+    assert vertices.shape == Torus.verts_padded().shape
+    assert verts_rgba.shape == (*vertices.shape[:2], 4)
+    assert (verts_rgba[..., 3] == 0.5).all()
+    pointclouds = mesh_to_pointcloud_vc(Torus, include_textures=False)
+    assert pointclouds.features_padded() is None
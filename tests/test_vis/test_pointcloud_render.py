@@ -0,0 +1,69 @@
+import pytest
+import torch
+from pytorch3d.utils import ico_sphere
+
+from mmhuman3d.core.cameras import compute_orbit_cameras
+from mmhuman3d.core.cameras.builder import build_cameras
+from mmhuman3d.core.renderer.torch3d_renderer.builder import build_renderer
+
+
+def _build_inputs(batch_size=2, resolution=64):
+    if torch.cuda.is_available():
+        device_name = 'cuda:0'
+    else:
+        device_name = 'cpu'
+    device = torch.device(device_name)
+    vertices = ico_sphere(3, device).verts_padded().repeat(batch_size, 1, 1)
+    verts_rgba = torch.rand(*vertices.shape[:2], 4, device=device)
+    K, R, T = compute_orbit_cameras(orbit_speed=1.0, batch_size=batch_size)
+    cameras = build_cameras(
+        dict(type='fovperspective', K=K, R=R, T=T,
+             resolution=resolution)).to(device)
+    renderer = build_renderer(
+        dict(
+            type='pointcloud',
+            resolution=resolution,
+            device=device,
+            radius=0.02,
+            rasterizer=dict(points_per_pixel=1)))
+    return renderer, vertices, verts_rgba, cameras
+
+
+def test_pointcloud_fast_render():
+    renderer, vertices, verts_rgba, cameras = _build_inputs()
+    tensor = renderer(
+        vertices=vertices, verts_rgba=verts_rgba, cameras=cameras)
+    assert tensor.shape == (2, 64, 64, 4)
+    # with one point per pixel, the z-buffer splatting should give the same
+    # images as the PyTorch3D rasterizer
+    with torch.no_grad():
+        tensor_fast = renderer(
+            vertices=vertices, verts_rgba=verts_rgba, cameras=cameras)
+    assert torch.allclose(tensor.detach(), tensor_fast, atol=1e-4)
+
+
+def test_pointcloud_render_empty():
+    renderer, vertices, verts_rgba, cameras = _build_inputs()
+    tensor = renderer(
+        vertices=vertices[:, :0],
+        verts_rgba=verts_rgba[:, :0],
+        cameras=cameras)
+    assert tensor.shape == (2, 64, 64, 4)
+    assert tensor.abs().sum() == 0
+
+
+@pytest.mark.skipif(
+    not hasattr(torch, 'inference_mode'), reason='requires torch >= 1.9')
+def test_pointcloud_render_inference_tensor():
+    renderer, vertices, verts_rgba, cameras = _build_inputs()
+    # e.g. body model outputs of a demo run under inference mode
+    with torch.inference_mode():
+        verts_rgba = verts_rgba.clone()
+    tensor = renderer(
+        vertices=vertices, verts_rgba=verts_rgba, cameras=cameras)
+    assert tensor.shape == (2, 64, 64, 4)
+    renderer.eval()
+    with torch.no_grad():
+        tensor = renderer(
+            vertices=vertices, verts_rgba=verts_rgba, cameras=cameras)
+    assert tensor.shape == (2, 64, 64, 4)
@@ -38,3 +38,44 @@ def test_render_runner():
         batch_size=2,
         output_path='/tmp/demo.mp4')
     assert tensor.shape == (2, 128, 128, 4)
+
+    # the tail batch should be rendered when batch_size is not a divisor
+    K, R, T = compute_orbit_cameras(orbit_speed=1.0, batch_size=3)
+    cameras = build_cameras(
+        dict(type='fovperspective', K=K, R=R, T=T, resolution=resolution))
+    renderer = build_renderer(
+        dict(
+            type='mesh',
+            resolution=resolution,
+            shader=dict(type='soft_phong'),
+            lights=dict(type='ambient')))
+    tensor = render_runner.render(
+        meshes=meshes.extend(3),
+        cameras=cameras,
+        renderer=renderer,
+        device=device,
+        return_tensor=True,
+        batch_size=2)
+    assert tensor.shape == (3, 128, 128, 4)
+
+    # a single static mesh should be rendered for each of the cameras
+    tensor = render_runner.render(
+        meshes=meshes,
+        cameras=cameras,
+        renderer=renderer,
+        device=device,
+        return_tensor=True,
+        batch_size=2,
+        static_geometry=True)
+    assert tensor.shape == (3, 128, 128, 4)
+
+    # batch_size=None sizes the batches automatically
+    tensor = render_runner.render(
+        meshes=meshes,
+        cameras=cameras,
+        renderer=renderer,
+        device=device,
+        return_tensor=True,
+        batch_size=None,
+        static_geometry=True)
+    assert tensor.shape == (3, 128, 128, 4)